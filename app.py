@@ -153,6 +153,148 @@ def save_schedules(schedules):
     with open(SCHEDULES_FILE, 'w') as f:
         json.dump(schedules, f)
 
+# Schedule repair functions
+SHIFT_KEYS = ["shift1", "shift2", "shift3"]
+
+def has_limitation(engineer, day, shift_key):
+    # Limitations are stored as {"<day>": ["shift1", ...]}, same as the frontend
+    limitations = engineer.get('limitations') or {}
+    blocked = limitations.get(str(day)) or []
+    return isinstance(blocked, list) and shift_key in blocked
+
+def iter_schedule_cells(period_data):
+    # Yield (workplace, day, shift_key, name) in chronological order:
+    # day, then shift, then workplace
+    cells = []
+    for workplace in WORKPLACES:
+        for day, shifts in period_data.get(workplace, {}).items():
+            for shift_key in SHIFT_KEYS:
+                name = shifts.get(shift_key)
+                if name:
+                    cells.append((workplace, day, shift_key, name))
+    cells.sort(key=lambda cell: (int(cell[1]), SHIFT_KEYS.index(cell[2]), WORKPLACES.index(cell[0])))
+    return cells
+
+def repair_schedule(period_data, engineers, changed_names=None, from_day=1):
+    """Reassign only the cells of a period invalidated by engineer changes.
+
+    A cell is invalid when its engineer no longer exists, can no longer work
+    at the workplace, has a limitation on that day/shift, or is over their
+    maxShifts for the month (the latest days are the ones dropped). Only
+    engineers in changed_names are checked (all engineers if None), and only
+    on days from from_day onward; earlier days still count toward the totals.
+    Every other cell is left untouched; freed cells are refilled with the
+    same priority the auto-assign uses (below minShifts first, then fewest
+    shifts), counting the existing totals.
+
+    Modifies period_data in place and returns the list of changed cells.
+    """
+    # First match wins, like add_engineer() when names are duplicated
+    engineers_by_name = {}
+    for eng in engineers:
+        engineers_by_name.setdefault(eng['name'], eng)
+
+    assignments = {eng['name']: 0 for eng in engineers}
+    busy = set()  # (name, day, shift_key) already worked in some workplace
+    for workplace, day, shift_key, name in iter_schedule_cells(period_data):
+        assignments[name] = assignments.get(name, 0) + 1
+        busy.add((name, day, shift_key))
+
+    # Find invalidated cells
+    invalid = []
+    kept = {}
+    for workplace, day, shift_key, name in iter_schedule_cells(period_data):
+        if changed_names is not None and name not in changed_names:
+            continue
+        if int(day) < from_day:
+            # Days already worked are history, but still count toward maxShifts
+            kept[name] = kept.get(name, 0) + 1
+            continue
+        eng = engineers_by_name.get(name)
+        if (eng is None
+                or workplace not in eng.get('workplaces', [])
+                or has_limitation(eng, day, shift_key)
+                or kept.get(name, 0) >= (eng.get('maxShifts') or 30)):
+            invalid.append((workplace, day, shift_key, name))
+        else:
+            kept[name] = kept.get(name, 0) + 1
+
+    # Free the invalid cells before refilling so the totals are accurate
+    for workplace, day, shift_key, name in invalid:
+        del period_data[workplace][day][shift_key]
+        assignments[name] -= 1
+        busy.discard((name, day, shift_key))
+
+    changes = []
+    for workplace, day, shift_key, old_name in invalid:
+        candidates = [
+            eng for eng in engineers
+            if workplace in eng.get('workplaces', [])
+            and not has_limitation(eng, day, shift_key)
+            and assignments[eng['name']] < (eng.get('maxShifts') or 30)
+            and (eng['name'], day, shift_key) not in busy
+        ]
+        new_name = None
+        if candidates:
+            best = min(candidates, key=lambda eng: (
+                assignments[eng['name']] >= (eng.get('minShifts') or 10),
+                assignments[eng['name']]
+            ))
+            new_name = best['name']
+            period_data[workplace][day][shift_key] = new_name
+            assignments[new_name] += 1
+            busy.add((new_name, day, shift_key))
+
+        if new_name != old_name:
+            changes.append({
+                "workplace": workplace,
+                "day": int(day),
+                "shift": shift_key,
+                "old": old_name,
+                "new": new_name
+            })
+
+    # Drop days left with no shifts, once every freed cell has been tried
+    for workplace, day, shift_key, old_name in invalid:
+        if day in period_data[workplace] and not period_data[workplace][day]:
+            del period_data[workplace][day]
+
+    return changes
+
+def repair_start_day(year, month, today):
+    # First day of a period that may still change: None for past months,
+    # today for the current month and day 1 for later months
+    if (year, month) < (today.year, today.month):
+        return None
+    if (year, month) == (today.year, today.month):
+        return today.day
+    return 1
+
+def repair_upcoming_schedules(changed_names):
+    # Repair the current month from today onward and every later stored month
+    today = jdt.date.today()
+    schedules = load_schedules()
+    engineers = load_engineers()
+    repaired = {}
+    for period_key, period_data in schedules.items():
+        try:
+            year, month = (int(part) for part in period_key.split('-'))
+        except ValueError:
+            continue
+        # Skip keys that can't be a Jalali period, like the old Gregorian "2025-4"
+        if year > today.year + 1:
+            continue
+        from_day = repair_start_day(year, month, today)
+        if from_day is None:
+            continue
+        changes = repair_schedule(period_data, engineers, changed_names, from_day)
+        if changes:
+            repaired[period_key] = changes
+            print(f"REPAIR_SCHEDULE: {len(changes)} cells changed in {period_key}")
+    if repaired:
+        save_schedules(schedules)
+    return repaired
+
 # Login required decorator
 def login_required(f):
     def decorated_function(*args, **kwargs):
@@ -362,7 +504,10 @@ def add_engineer():
     print(f"ADD_ENGINEER: Verification loaded {len(verification)} engineers")
     print(f"ADD_ENGINEER: Verified engineer names: {[eng.get('name', 'UNNAMED') for eng in verification]}")
     
-    return jsonify({"status": "success"})
+    # Fix only the upcoming cells this edit made invalid
+    repaired = repair_upcoming_schedules({data['name']}) if engineer_exists else {}
+    
+    return jsonify({"status": "success", "repaired": repaired})
 
 @app.route('/api/engineers/<n>', methods=['DELETE'])
 @admin_required
@@ -370,7 +515,8 @@ def delete_engineer(n):
     engineers = load_engineers()
     engineers = [eng for eng in engineers if eng['name'] != n]
     save_engineers(engineers)
-    return jsonify({"status": "success"})
+    repaired = repair_upcoming_schedules({n})
+    return jsonify({"status": "success", "repaired": repaired})
 
 @app.route('/api/schedule', methods=['GET'])
 @login_required
@@ -414,6 +560,43 @@ def save_schedule():
     save_schedules(schedules)
     return jsonify({"status": "success"})
 
+@app.route('/api/schedule/repair', methods=['POST'])
+@admin_required
+def repair_schedule_route():
+    # A bare POST with no JSON body uses the defaults below
+    data = request.get_json(silent=True) or {}
+    # Default to current Jalali year and month, like get_schedule
+    today = jdt.date.today()
+    try:
+        year = int(data.get('year', today.year))
+        month = int(data.get('month', today.month))
+    except (TypeError, ValueError):
+        return jsonify({"error": "year and month must be integers"}), 400
+
+    # Check only the given engineers, or every engineer if none are given
+    names = data.get('engineers')
+    if names is not None and (not isinstance(names, list)
+                              or not all(isinstance(name, str) for name in names)):
+        return jsonify({"error": "engineers must be a list of names"}), 400
+    changed_names = set(names) if names is not None else None
+
+    # Days already worked are never changed
+    from_day = repair_start_day(year, month, today)
+    if from_day is None:
+        return jsonify({"error": "Past periods cannot be repaired"}), 400
+
+    schedules = load_schedules()
+    # Use Jalali year/month for the key
+    period_key = f"{year}-{month}"
+    if period_key not in schedules:
+        return jsonify({"error": "No schedule data found for selected period"}), 404
+
+    repaired = repair_schedule(schedules[period_key], load_engineers(), changed_names, from_day)
+    if repaired:
+        save_schedules(schedules)
+        print(f"REPAIR_SCHEDULE: {len(repaired)} cells changed in {period_key}")
+    return jsonify({"status": "success", "repaired": repaired})
+
 @app.route('/api/generate_excel', methods=['POST'])
 @login_required
 def generate_excel():